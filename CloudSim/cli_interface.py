@@ -405,6 +405,7 @@ class DistributedStorageCLI(cmd.Cmd):
         if self.network_started:
             print("🛑 Shutting down network before exit...")
             self.do_shutdown(arg)
+        self.transfer_simulator.shutdown()
         print("👋 Goodbye!")
         return True
     
@@ -17,6 +17,7 @@ Features Tested:
 """
 
 import os
+import base64
 import time
 import tempfile
 import hashlib
@@ -153,7 +154,7 @@ def test_file_storage():
             retrieve_result = node1.call_remote_method("storage1", "retrieve_file_chunk", {"file_id": file_id})
             
             if retrieve_result.get('success'):
-                retrieved_content = bytes.fromhex(retrieve_result['chunk_data']).decode()
+                retrieved_content = base64.b64decode(retrieve_result['chunk_data']).decode()
                 if test_content in retrieved_content:  # Check if content is present (not exact match due to chunking)
                     print_success("File retrieval successful - content verified!")
                     return True
@@ -1,13 +1,19 @@
 import socket
+import selectors
+import struct
 import threading
 import time
 import json
+import logging
 import hashlib
+from collections import deque
 from typing import Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum, auto
 import random
 
+logger = logging.getLogger(__name__)
+
 class MessageTypes(Enum):
     HEARTBEAT = "heartbeat"
     HEARTBEAT_RESPONSE = "heartbeat_response"
@@ -72,6 +78,79 @@ class IPManager:
             return True
         return False
 
+# Every message on the wire is a 4-byte big-endian length followed by the JSON body
+FRAME_HEADER = struct.Struct("!I")
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or None if the peer closed the connection"""
+    buf = bytearray()
+    while len(buf) < size:
+        data = sock.recv(size - len(buf))
+        if not data:
+            return None
+        buf += data
+    return bytes(buf)
+
+SOCKET_BUFFER_SIZE = 1 << 20  # Room for a whole base64 chunk frame in flight
+
+def _tune_socket(sock: socket.socket):
+    """Disable Nagle and enlarge buffers; call before connect/listen so window scaling applies"""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+
+class RPCConnectionPool:
+    def __init__(self, conn_pool_max_size: int = 8, connect_timeout: float = 10.0):
+        self.conn_pool_max_size = conn_pool_max_size  # Idle sockets kept per destination
+        self.connect_timeout = connect_timeout
+        self._idle: Dict[Tuple[str, int], deque] = {}
+        self._lock = threading.Lock()
+    
+    def get_rpc_session(self, ip: str, port: int) -> socket.socket:
+        """Check out an idle connection to (ip, port) or open a new one"""
+        key = (ip, port)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                sock = idle.pop() if idle else None
+            if sock is None:
+                break
+            # An idle RPC socket never has anything to read; readable means the peer closed it.
+            # selectors (epoll/kqueue where available) has no FD_SETSIZE limit, unlike select()
+            with selectors.DefaultSelector() as selector:
+                selector.register(sock, selectors.EVENT_READ)
+                readable = selector.select(0)
+            if not readable:
+                return sock
+            sock.close()
+        
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        _tune_socket(sock)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect((ip, port))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    
+    def release(self, ip: str, port: int, sock: socket.socket):
+        """Return a healthy connection to the pool"""
+        with self._lock:
+            idle = self._idle.setdefault((ip, port), deque())
+            if len(idle) < self.conn_pool_max_size:
+                idle.append(sock)
+                return
+        sock.close()
+    
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle_sockets = [sock for idle in self._idle.values() for sock in idle]
+            self._idle.clear()
+        for sock in idle_sockets:
+            sock.close()
+
 class TCPCommunication:
     def __init__(self, node_id: str, ip: str, port: int):
         self.node_id = node_id
@@ -83,11 +162,13 @@ class TCPCommunication:
         self.message_handlers: Dict[MessageTypes, Callable] = {}
         self.pending_acks: Dict[str, Tuple[NetworkMessage, float]] = {}
         self.ack_timeout = 5.0  # seconds
+        self.rpc_pool = RPCConnectionPool()
         
     def start_server(self):
         """Start the TCP server for this node"""
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        _tune_socket(self.server_socket)  # Accepted sockets inherit these options
         
         # Try to bind to the specified IP and port
         try:
@@ -135,13 +216,17 @@ class TCPCommunication:
         print(f"[{self.node_id}] Client connected from {address}")
         try:
             while self.running:
-                data = client_socket.recv(4096)
-                if not data:
+                header = _recv_exact(client_socket, FRAME_HEADER.size)
+                if header is None:
+                    break
+                (length,) = FRAME_HEADER.unpack(header)
+                data = _recv_exact(client_socket, length)
+                if data is None:
                     break
                 
-                print(f"[{self.node_id}] Received {len(data)} bytes from {address}")
+                logger.debug("[%s] Received %d bytes from %s", self.node_id, len(data), address)
                 try:
-                    message_data = json.loads(data.decode())
+                    message_data = json.loads(data)
                     # Convert string message_type back to enum
                     message_data['message_type'] = MessageTypes(message_data['message_type'])
                     message = NetworkMessage(**message_data)
@@ -157,7 +242,7 @@ class TCPCommunication:
     
     def _process_message(self, message: NetworkMessage, client_socket: socket.socket):
         """Process incoming message"""
-        print(f"[{self.node_id}] Received {message.message_type.value} from {message.source_ip}")
+        logger.debug("[%s] Received %s from %s", self.node_id, message.message_type.value, message.source_ip)
         
         # Handle message based on type
         if message.message_type == MessageTypes.HEARTBEAT:
@@ -190,7 +275,7 @@ class TCPCommunication:
             # Process acknowledgment
             self._handle_ack(message)
         elif message.message_type in self.message_handlers:
-            print(f"[{self.node_id}] Dispatching to handler for {message.message_type.value}")
+            logger.debug("[%s] Dispatching to handler for %s", self.node_id, message.message_type.value)
             self.message_handlers[message.message_type](message)
         else:
             print(f"[{self.node_id}] No handler for message type: {message.message_type.value}")
@@ -207,25 +292,15 @@ class TCPCommunication:
         try:
             print(f"[{self.node_id}] Connecting to {target_ip}:{target_port}")
             client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            _tune_socket(client_socket)
             client_socket.settimeout(10.0)  # 10 second timeout
             client_socket.connect((target_ip, target_port))
             print(f"[{self.node_id}] Connected to {target_ip}:{target_port}")
             
-            # Convert message to JSON-serializable format
-            message_dict = {
-                "message_id": message.message_id,
-                "message_type": message.message_type.value,  # Convert enum to string
-                "source_ip": message.source_ip,
-                "target_ip": message.target_ip,
-                "payload": message.payload,
-                "timestamp": message.timestamp,
-                "requires_ack": message.requires_ack
-            }
-            
             # Send message
-            message_data = json.dumps(message_dict).encode()
+            message_data = self._encode_message(message)
             print(f"[{self.node_id}] Sending {len(message_data)} bytes to {target_ip}:{target_port}")
-            client_socket.send(message_data)
+            client_socket.sendall(message_data)
             print(f"[{self.node_id}] Message sent to {target_ip}:{target_port}")
             
             # Store for ACK tracking if required
@@ -239,11 +314,48 @@ class TCPCommunication:
             print(f"[{self.node_id}] Error sending message to {target_ip}:{target_port} - {e}")
             return False
     
+    def send_pooled_message(self, target_ip: str, target_port: int, message: NetworkMessage) -> bool:
+        """Send message over a pooled connection, reconnecting once if it went stale"""
+        message_data = self._encode_message(message)
+        for attempt in range(2):
+            try:
+                client_socket = self.rpc_pool.get_rpc_session(target_ip, target_port)
+            except Exception as e:
+                print(f"[{self.node_id}] Error connecting to {target_ip}:{target_port} - {e}")
+                return False
+            try:
+                client_socket.sendall(message_data)
+            except Exception as e:
+                client_socket.close()
+                if attempt:
+                    print(f"[{self.node_id}] Error sending message to {target_ip}:{target_port} - {e}")
+                    return False
+                continue
+            
+            # RPC traffic is answered by an RPC response, never a DATA_ACK, so no ACK tracking here
+            self.rpc_pool.release(target_ip, target_port, client_socket)
+            return True
+        return False
+    
+    def _encode_message(self, message: NetworkMessage) -> bytes:
+        """Serialize a message into a length-prefixed frame"""
+        message_dict = {
+            "message_id": message.message_id,
+            "message_type": message.message_type.value,  # Convert enum to string
+            "source_ip": message.source_ip,
+            "target_ip": message.target_ip,
+            "payload": message.payload,
+            "timestamp": message.timestamp,
+            "requires_ack": message.requires_ack
+        }
+        body = json.dumps(message_dict, separators=(',', ':')).encode()
+        return FRAME_HEADER.pack(len(body)) + body
+    
     def _send_message_direct(self, message: NetworkMessage, client_socket: socket.socket):
         """Send message directly through existing socket"""
         try:
-            message_data = json.dumps(message.__dict__).encode()
-            client_socket.send(message_data)
+            message_data = self._encode_message(message)
+            client_socket.sendall(message_data)
         except Exception as e:
             print(f"[{self.node_id}] Error sending direct message: {e}")
     
@@ -253,14 +365,15 @@ class TCPCommunication:
             current_time = time.time()
             expired_messages = []
             
-            for message_id, (message, sent_time) in self.pending_acks.items():
+            # Snapshot: sender threads insert while this thread scans
+            for message_id, (message, sent_time) in list(self.pending_acks.items()):
                 if current_time - sent_time > self.ack_timeout:
                     expired_messages.append(message_id)
                     print(f"[{self.node_id}] ACK timeout for message {message_id}")
             
             # Remove expired messages
             for message_id in expired_messages:
-                del self.pending_acks[message_id]
+                self.pending_acks.pop(message_id, None)
             
             time.sleep(1)  # Check every second
     
@@ -275,6 +388,7 @@ class TCPCommunication:
     def stop(self):
         """Stop the TCP server"""
         self.running = False
+        self.rpc_pool.close_all()
         if self.server_socket:
             self.server_socket.close()
 
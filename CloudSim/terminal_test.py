@@ -5,6 +5,7 @@ Run this to verify all functionality works perfectly
 """
 
 import os
+import base64
 import time
 import tempfile
 from virtual_node import VirtualNode
@@ -110,7 +111,7 @@ def test_file_operations():
                                                       {"file_id": file_id})
             
             if retrieve_result.get('success'):
-                retrieved_content = bytes.fromhex(retrieve_result['chunk_data']).decode()
+                retrieved_content = base64.b64decode(retrieve_result['chunk_data']).decode()
                 if retrieved_content == test_content:
                     print_status("File retrieval successful - content matches!", "SUCCESS")
                 else:
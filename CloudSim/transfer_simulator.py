@@ -1,6 +1,10 @@
 import time
+import random
 import threading
-from typing import Dict, List, Optional, Callable
+import collections
+import itertools
+from array import array
+from typing import Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -10,60 +14,147 @@ class TransferSpeed(Enum):
     FAST = "10mb/s"      # 10 MB/s
     VERY_FAST = "100mb/s" # 100 MB/s
 
+_SPEED_BPS: Dict[TransferSpeed, int] = {
+    TransferSpeed.SLOW: 64 * 1024,           # 64 KB/s
+    TransferSpeed.MEDIUM: 1024 * 1024,       # 1 MB/s
+    TransferSpeed.FAST: 10 * 1024 * 1024,    # 10 MB/s
+    TransferSpeed.VERY_FAST: 100 * 1024 * 1024  # 100 MB/s
+}
+
 @dataclass
 class TransferConfig:
     speed: TransferSpeed
     latency_ms: int = 50  # Network latency in milliseconds
     packet_loss: float = 0.0  # Packet loss percentage (0.0 to 1.0)
     jitter_ms: int = 10  # Jitter in milliseconds
+    
+    @property
+    def speed_bps(self) -> int:
+        """Bytes per second for speed, looked up on access so it follows reassignment"""
+        return _SPEED_BPS[self.speed]
 
 class TransferSimulator:
+    speed_bytes_per_second = _SPEED_BPS  # Shared table, kept under its public name
+    
     def __init__(self, default_config: Optional[TransferConfig] = None):
-        self.speed_bytes_per_second = {
-            TransferSpeed.SLOW: 64 * 1024,           # 64 KB/s
-            TransferSpeed.MEDIUM: 1024 * 1024,       # 1 MB/s
-            TransferSpeed.FAST: 10 * 1024 * 1024,    # 10 MB/s
-            TransferSpeed.VERY_FAST: 100 * 1024 * 1024  # 100 MB/s
-        }
-        
         self.default_config = default_config or TransferConfig(TransferSpeed.SLOW)
+        self._progress_min_interval = 0.033  # Coalesce progress events to ~30 Hz
         self.active_transfers: Dict[str, 'FileTransfer'] = {}
-        self.transfer_history: List[Dict] = []
+        self._active_lock = threading.Lock()
+        
+        # Transfer history is a bounded ring of per-field columns; the oldest
+        # entry is overwritten once capacity is reached
+        self._hist_capacity = 100_000
+        self._hist_ids: List[Optional[str]] = [None] * self._hist_capacity
+        self._hist_file_size = array('q', [0]) * self._hist_capacity
+        self._hist_duration = array('d', [0.0]) * self._hist_capacity
+        self._hist_speed = array('d', [0.0]) * self._hist_capacity  # 0.0 for failed transfers
+        self._hist_timestamp = array('d', [0.0]) * self._hist_capacity
+        self._hist_status = bytearray(self._hist_capacity)  # 1 = completed, 0 = failed or empty
+        self._hist_head = 0
+        self._hist_count = 0
+        self._hist_lock = threading.Lock()
+        self._history_version = 0  # Bumped on every history append
+        self._cached_stats: Optional[Dict] = None
+        self._cached_stats_version = -1
+        self._cached_history: List[Dict] = []
+        self._cached_history_version = 0
         self.callbacks: Dict[str, List[Callable]] = {
             'transfer_started': [],
+            'transfer_started_batch': [],
             'transfer_progress': [],
             'transfer_completed': [],
             'transfer_failed': []
         }
+        self._has_listeners: Dict[str, bool] = {event: False for event in self.callbacks}
+        
+        # Events are queued by transfer threads and fanned out by a dispatcher
+        # thread, so slow callbacks never stall a transfer loop. Lifecycle
+        # events are always queued; once a lagging callback lets the backlog
+        # reach _event_backlog_limit, progress events are dropped until the
+        # dispatcher catches up, so the queue only grows with transfer count.
+        self._event_deque = collections.deque()
+        self._event_backlog_limit = 4096
+        self._event_cond = threading.Condition()
+        self._dispatcher_thread: Optional[threading.Thread] = None
     
     def register_callback(self, event: str, callback: Callable):
         """Register a callback for transfer events"""
         if event in self.callbacks:
             self.callbacks[event].append(callback)
+            self._has_listeners[event] = True
+            self._start_dispatcher()
+    
+    def _start_dispatcher(self):
+        """Start the callback dispatcher thread if it is not running"""
+        with self._event_cond:
+            if self._dispatcher_thread is not None:
+                return
+            self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher_thread.start()
+    
+    def _stop_dispatcher(self, timeout: Optional[float] = 1.0):
+        """Stop the dispatcher thread, waiting up to timeout for it to exit"""
+        with self._event_cond:
+            dispatcher = self._dispatcher_thread
+            self._dispatcher_thread = None
+            self._event_cond.notify_all()
+        if dispatcher is not None and dispatcher is not threading.current_thread():
+            dispatcher.join(timeout)
+    
+    def _dispatch_loop(self):
+        """Dispatcher loop feeding queued events to callbacks"""
+        # Exits once _stop_dispatcher clears (or replaces) the current dispatcher
+        while self._dispatcher_thread is threading.current_thread():
+            self._drain_events(timeout=1.0)
     
     def _trigger_callbacks(self, event: str, transfer_data: dict):
-        """Trigger callbacks for an event"""
-        for callback in self.callbacks.get(event, []):
-            try:
-                callback(transfer_data)
-            except Exception as e:
-                print(f"Callback error: {e}")
+        """Queue an event for the dispatcher"""
+        if not self._has_listeners.get(event):
+            return
+        with self._event_cond:
+            if event == 'transfer_progress' and len(self._event_deque) >= self._event_backlog_limit:
+                return
+            self._event_deque.append((event, transfer_data))
+            self._event_cond.notify()
+    
+    def _drain_events(self, timeout: Optional[float] = None) -> List[Tuple[str, dict]]:
+        """Dispatch queued events to their callbacks, waiting up to timeout for one"""
+        with self._event_cond:
+            if not self._event_deque:
+                self._event_cond.wait(timeout)
+            events = list(self._event_deque)
+            self._event_deque.clear()
+        
+        me = threading.current_thread()
+        for event, transfer_data in events:
+            if self._dispatcher_thread is not me:
+                break  # Stopped; drop the rest instead of blocking shutdown
+            for callback in self.callbacks.get(event, []):
+                try:
+                    callback(transfer_data)
+                except Exception as e:
+                    print(f"Callback error: {e}")
+        
+        return events
     
     def simulate_transfer(self, transfer_id: str, file_size: int, 
                          config: Optional[TransferConfig] = None) -> 'FileTransfer':
         """Start a simulated file transfer"""
         transfer_config = config or self.default_config
-        speed_bps = self.speed_bytes_per_second[transfer_config.speed]
+        speed_bps = transfer_config.speed_bps
         
         transfer = FileTransfer(
             transfer_id=transfer_id,
             file_size=file_size,
             speed_bps=speed_bps,
             config=transfer_config,
-            start_time=time.time()
+            start_time=time.time(),
+            start_monotonic=time.monotonic()
         )
         
-        self.active_transfers[transfer_id] = transfer
+        with self._active_lock:
+            self.active_transfers[transfer_id] = transfer
         
         # Start transfer in background thread
         transfer_thread = threading.Thread(
@@ -75,59 +166,135 @@ class TransferSimulator:
         
         return transfer
     
-    def _execute_transfer(self, transfer: 'FileTransfer'):
+    def simulate_transfers(self, requests: List[Tuple[str, int, Optional[TransferConfig]]]) -> List['FileTransfer']:
+        """Start a batch of simulated transfers
+        
+        Registers the whole batch under one lock and fires a single 'transfer_started_batch' event instead of one
+        'transfer_started' event per transfer.
+        """
+        now = time.time()
+        now_mono = time.monotonic()
+        transfers = []
+        for transfer_id, file_size, config in requests:
+            transfer_config = config or self.default_config
+            transfers.append(FileTransfer(
+                transfer_id=transfer_id,
+                file_size=file_size,
+                speed_bps=transfer_config.speed_bps,
+                config=transfer_config,
+                start_time=now,
+                start_monotonic=now_mono
+            ))
+        
+        with self._active_lock:
+            for transfer in transfers:
+                self.active_transfers[transfer.transfer_id] = transfer
+        
+        self._trigger_callbacks('transfer_started_batch', {
+            'transfers': [
+                {
+                    'transfer_id': t.transfer_id,
+                    'file_size': t.file_size,
+                    'speed_bps': t.speed_bps
+                }
+                for t in transfers
+            ]
+        })
+        
+        # One thread per transfer, as in simulate_transfer, so the batch runs concurrently
+        for transfer in transfers:
+            threading.Thread(
+                target=self._execute_transfer,
+                args=(transfer, False),
+                daemon=True
+            ).start()
+        
+        return transfers
+    
+    def shutdown(self):
+        """Cancel active transfers and stop the dispatcher"""
+        with self._active_lock:
+            for transfer in self.active_transfers.values():
+                transfer.status = TransferStatus.CANCELLED
+        self._stop_dispatcher()
+    
+    def _execute_transfer(self, transfer: 'FileTransfer', notify_started: bool = True):
         """Execute the transfer simulation"""
         transfer.status = TransferStatus.RUNNING
         
         # Trigger transfer started callback
-        self._trigger_callbacks('transfer_started', {
-            'transfer_id': transfer.transfer_id,
-            'file_size': transfer.file_size,
-            'speed_bps': transfer.speed_bps
-        })
+        if notify_started:
+            self._trigger_callbacks('transfer_started', {
+                'transfer_id': transfer.transfer_id,
+                'file_size': transfer.file_size,
+                'speed_bps': transfer.speed_bps
+            })
         
         chunk_size = 1024  # 1KB chunks for simulation
-        bytes_transferred = 0
-        start_time = time.time()
+        start_mono = time.monotonic()
         
-        while bytes_transferred < transfer.file_size and transfer.status == TransferStatus.RUNNING:
-            # Calculate transfer time for this chunk
-            chunk_transfer_time = chunk_size / transfer.speed_bps
-            
-            # Add latency and jitter
-            latency_factor = (transfer.config.latency_ms / 1000) / chunk_size
-            jitter_factor = (transfer.config.jitter_ms / 1000) / chunk_size
+        # Per-chunk timing is constant for the whole transfer
+        chunk_transfer_time = chunk_size / transfer.speed_bps
+        latency_factor = (transfer.config.latency_ms / 1000) / chunk_size
+        jitter_factor = (transfer.config.jitter_ms / 1000) / chunk_size
+        chunk_sleep = chunk_transfer_time * (1 + latency_factor + jitter_factor)
+        
+        has_loss = transfer.config.packet_loss > 0
+        if transfer.file_size <= chunk_size and not has_loss:
+            # Single-chunk transfer: one proportional sleep, no loop
+            time.sleep(transfer.file_size / transfer.speed_bps * (1 + latency_factor + jitter_factor))
+            if transfer.status == TransferStatus.RUNNING:
+                transfer.bytes_transferred = transfer.file_size
+                transfer.progress = 1.0
+                self._trigger_callbacks('transfer_progress', {
+                    'transfer_id': transfer.transfer_id,
+                    'bytes_transferred': transfer.file_size,
+                    'progress': 1.0,
+                    'speed_bps': transfer.speed_bps
+                })
+        else:
+            file_size = transfer.file_size
+            packet_loss = transfer.config.packet_loss
+            rand = random.random
+            bytes_transferred = 0
+            progress = 0.0
+            progress_step = chunk_size / file_size if file_size else 1.0
+            last_progress_emit = 0.0
+            last_progress = 0.0
             
-            # Simulate packet loss (retry with delay)
-            if transfer.config.packet_loss > 0:
-                import random
-                if random.random() < transfer.config.packet_loss:
-                    # Packet lost, add retry delay
+            while bytes_transferred < file_size and transfer.status == TransferStatus.RUNNING:
+                # Simulate packet loss (retry with delay)
+                if has_loss and rand() < packet_loss:
                     time.sleep(0.1)  # 100ms retry delay
                     continue
-            
-            # Simulate the transfer
-            time.sleep(chunk_transfer_time * (1 + latency_factor + jitter_factor))
-            
-            bytes_transferred += chunk_size
-            progress = min(bytes_transferred / transfer.file_size, 1.0)
-            
-            # Update transfer progress
-            transfer.bytes_transferred = bytes_transferred
-            transfer.progress = progress
-            
-            # Trigger progress callback
-            self._trigger_callbacks('transfer_progress', {
-                'transfer_id': transfer.transfer_id,
-                'bytes_transferred': bytes_transferred,
-                'progress': progress,
-                'speed_bps': transfer.speed_bps
-            })
+                
+                # Simulate the transfer
+                time.sleep(chunk_sleep)
+                
+                bytes_transferred += chunk_size
+                progress = 1.0 if bytes_transferred >= file_size else progress + progress_step
+                
+                # Update transfer progress
+                transfer.bytes_transferred = bytes_transferred
+                transfer.progress = progress
+                
+                # Trigger progress callback, coalescing chunks between emits
+                if self._has_listeners['transfer_progress'] and progress != last_progress:
+                    now = time.monotonic()
+                    if progress == 1.0 or now - last_progress_emit >= self._progress_min_interval:
+                        self._trigger_callbacks('transfer_progress', {
+                            'transfer_id': transfer.transfer_id,
+                            'bytes_transferred': bytes_transferred,
+                            'progress': progress,
+                            'speed_bps': transfer.speed_bps
+                        })
+                        last_progress_emit = now
+                        last_progress = progress
         
         # Transfer completed or failed
-        end_time = time.time()
+        end_time = time.time()  # Wall clock, kept for history timestamps
         transfer.end_time = end_time
-        transfer.duration = end_time - start_time
+        transfer.duration = time.monotonic() - start_mono
         
         if transfer.status == TransferStatus.RUNNING:
             transfer.status = TransferStatus.COMPLETED
@@ -140,14 +307,7 @@ class TransferSimulator:
                 'actual_speed_bps': transfer.actual_speed_bps
             })
             
-            self.transfer_history.append({
-                'transfer_id': transfer.transfer_id,
-                'file_size': transfer.file_size,
-                'duration': transfer.duration,
-                'speed_bps': transfer.actual_speed_bps,
-                'status': 'completed',
-                'timestamp': end_time
-            })
+            self._record_history(transfer, True, end_time)
         else:
             # Transfer was cancelled/failed
             self._trigger_callbacks('transfer_failed', {
@@ -155,72 +315,134 @@ class TransferSimulator:
                 'reason': 'Transfer cancelled'
             })
             
-            self.transfer_history.append({
-                'transfer_id': transfer.transfer_id,
-                'file_size': transfer.file_size,
-                'duration': transfer.duration,
-                'status': 'failed',
-                'timestamp': end_time
-            })
+            self._record_history(transfer, False, end_time)
         
         # Remove from active transfers
-        if transfer.transfer_id in self.active_transfers:
-            del self.active_transfers[transfer.transfer_id]
+        with self._active_lock:
+            self.active_transfers.pop(transfer.transfer_id, None)
+    
+    def _record_history(self, transfer: 'FileTransfer', completed: bool, timestamp: float):
+        """Append a finished transfer to the history ring"""
+        with self._hist_lock:
+            i = self._hist_head
+            self._hist_ids[i] = transfer.transfer_id
+            self._hist_file_size[i] = transfer.file_size
+            self._hist_duration[i] = transfer.duration
+            self._hist_speed[i] = transfer.actual_speed_bps if completed else 0.0
+            self._hist_timestamp[i] = timestamp
+            self._hist_status[i] = 1 if completed else 0
+            self._hist_head = (i + 1) % self._hist_capacity
+            if self._hist_count < self._hist_capacity:
+                self._hist_count += 1
+            self._history_version += 1
+    
+    def _history_record(self, i: int) -> Dict:
+        """Build the history dict for ring slot i (caller holds _hist_lock)"""
+        record = {
+            'transfer_id': self._hist_ids[i],
+            'file_size': self._hist_file_size[i],
+            'duration': self._hist_duration[i],
+            'status': 'completed' if self._hist_status[i] else 'failed',
+            'timestamp': self._hist_timestamp[i]
+        }
+        if self._hist_status[i]:
+            record['speed_bps'] = self._hist_speed[i]
+        return record
+    
+    @property
+    def transfer_history(self) -> List[Dict]:
+        """Finished transfers, oldest first
+        
+        The records are rebuilt only when history has changed since the last
+        read; callers get a new list sharing those (read-only) records. Use
+        recent_transfers() to poll just the latest entries.
+        """
+        with self._hist_lock:
+            if self._cached_history_version != self._history_version:
+                if self._hist_count < self._hist_capacity:
+                    indices = range(self._hist_count)
+                else:
+                    indices = itertools.chain(range(self._hist_head, self._hist_capacity),
+                                              range(self._hist_head))
+                self._cached_history = [self._history_record(i) for i in indices]
+                self._cached_history_version = self._history_version
+            return list(self._cached_history)
+    
+    def recent_transfers(self, n: int = 10) -> List[Dict]:
+        """The last n finished transfers, oldest first"""
+        with self._hist_lock:
+            count = min(max(n, 0), self._hist_count)
+            start = self._hist_head - count
+            return [self._history_record(i % self._hist_capacity) for i in range(start, self._hist_head)]
     
     def cancel_transfer(self, transfer_id: str) -> bool:
         """Cancel an active transfer"""
-        if transfer_id in self.active_transfers:
-            transfer = self.active_transfers[transfer_id]
-            transfer.status = TransferStatus.CANCELLED
-            return True
-        return False
+        transfer = self.active_transfers.get(transfer_id)
+        if transfer is None:
+            return False
+        transfer.status = TransferStatus.CANCELLED
+        return True
+    
+    @staticmethod
+    def _status_snapshot(transfer: 'FileTransfer') -> Dict:
+        """Build a status dict for a transfer"""
+        return {
+            'transfer_id': transfer.transfer_id,
+            'file_size': transfer.file_size,
+            'bytes_transferred': transfer.bytes_transferred,
+            'progress': transfer.progress,
+            'status': transfer.status.name,
+            'speed_bps': transfer.speed_bps,
+            'duration': time.monotonic() - transfer.start_monotonic
+        }
     
     def get_transfer_status(self, transfer_id: str) -> Optional[Dict]:
         """Get status of a transfer"""
-        if transfer_id in self.active_transfers:
-            transfer = self.active_transfers[transfer_id]
-            return {
-                'transfer_id': transfer.transfer_id,
-                'file_size': transfer.file_size,
-                'bytes_transferred': transfer.bytes_transferred,
-                'progress': transfer.progress,
-                'status': transfer.status.name,
-                'speed_bps': transfer.speed_bps,
-                'duration': time.time() - transfer.start_time
-            }
-        return None
+        transfer = self.active_transfers.get(transfer_id)
+        if transfer is None:
+            return None
+        return self._status_snapshot(transfer)
     
     def get_active_transfers(self) -> List[Dict]:
         """Get all active transfers"""
-        return [
-            self.get_transfer_status(tid) 
-            for tid in self.active_transfers.keys()
-        ]
+        with self._active_lock:
+            return [self._status_snapshot(t) for t in self.active_transfers.values()]
     
     def get_transfer_statistics(self) -> Dict:
         """Get transfer statistics"""
-        completed_transfers = [t for t in self.transfer_history if t['status'] == 'completed']
-        failed_transfers = [t for t in self.transfer_history if t['status'] == 'failed']
-        
-        if completed_transfers:
-            avg_speed = sum(t['speed_bps'] for t in completed_transfers) / len(completed_transfers)
-            avg_duration = sum(t['duration'] for t in completed_transfers) / len(completed_transfers)
-            total_bytes = sum(t['file_size'] for t in completed_transfers)
-        else:
-            avg_speed = 0
-            avg_duration = 0
-            total_bytes = 0
-        
-        return {
-            'total_transfers': len(self.transfer_history),
-            'completed_transfers': len(completed_transfers),
-            'failed_transfers': len(failed_transfers),
-            'active_transfers': len(self.active_transfers),
-            'average_speed_bps': avg_speed,
-            'average_duration': avg_duration,
-            'total_bytes_transferred': total_bytes,
-            'success_rate': len(completed_transfers) / max(len(self.transfer_history), 1) * 100
-        }
+        with self._hist_lock:
+            if self._cached_stats_version == self._history_version:
+                stats = dict(self._cached_stats)
+                stats['active_transfers'] = len(self.active_transfers)
+                return stats
+            
+            # Filled slots are always the first _hist_count entries of the ring
+            total = self._hist_count
+            status = memoryview(self._hist_status)[:total]
+            completed = self._hist_status.count(1, 0, total)
+            
+            if completed:
+                # Failed slots hold 0.0 speed and a 0 status byte
+                avg_speed = sum(memoryview(self._hist_speed)[:total]) / completed
+                avg_duration = sum(itertools.compress(memoryview(self._hist_duration)[:total], status)) / completed
+                total_bytes = sum(itertools.compress(memoryview(self._hist_file_size)[:total], status))
+            else:
+                avg_speed = 0
+                avg_duration = 0
+                total_bytes = 0
+            
+            self._cached_stats = {
+                'total_transfers': total,
+                'completed_transfers': completed,
+                'failed_transfers': total - completed,
+                'active_transfers': len(self.active_transfers),
+                'average_speed_bps': avg_speed,
+                'average_duration': avg_duration,
+                'total_bytes_transferred': total_bytes,
+                'success_rate': completed / max(total, 1) * 100
+            }
+            self._cached_stats_version = self._history_version
+            return dict(self._cached_stats)
 
 class TransferStatus(Enum):
     PENDING = auto()
@@ -229,7 +451,7 @@ class TransferStatus(Enum):
     FAILED = auto()
     CANCELLED = auto()
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class FileTransfer:
     transfer_id: str
     file_size: int
@@ -242,6 +464,7 @@ class FileTransfer:
     progress: float = 0.0
     status: TransferStatus = TransferStatus.PENDING
     actual_speed_bps: Optional[float] = None
+    start_monotonic: float = 0.0  # time.monotonic() at start, for elapsed-time math
 
 # Utility functions for common transfer scenarios
 def create_slow_transfer() -> TransferConfig:
@@ -206,26 +206,30 @@ class VirtualDisk:
         start_block = offset // block_size
         block_offset = offset % block_size
         
+        # Slice through a memoryview so each block's piece is written and hashed without copying
+        view = memoryview(data)
+        data_len = len(view)
         data_written = 0
-        for block_id in virtual_file.blocks[start_block:]:
-            if data_written >= len(data):
-                break
+        with open(self.disk_file, 'r+b') as f:
+            for block_id in virtual_file.blocks[start_block:]:
+                if data_written >= data_len:
+                    break
+                    
+                block = self.blocks[block_id]
+                remaining_data = data_len - data_written
+                bytes_to_write = min(remaining_data, block_size - block_offset)
+                piece = view[data_written:data_written + bytes_to_write]
                 
-            block = self.blocks[block_id]
-            remaining_data = len(data) - data_written
-            bytes_to_write = min(remaining_data, block_size - block_offset)
-            
-            # Write to disk file
-            with open(self.disk_file, 'r+b') as f:
+                # Write to disk file
                 f.seek(block.start_offset + block_offset)
-                f.write(data[data_written:data_written + bytes_to_write])
-            
-            # Update block metadata
-            block.status = BlockStatus.OCCUPIED
-            block.checksum = hashlib.md5(data[data_written:data_written + bytes_to_write]).hexdigest()
-            
-            data_written += bytes_to_write
-            block_offset = 0  # Only first block has offset
+                f.write(piece)
+                
+                # Update block metadata
+                block.status = BlockStatus.OCCUPIED
+                block.checksum = hashlib.md5(piece).hexdigest()
+                
+                data_written += bytes_to_write
+                block_offset = 0  # Only first block has offset
         
         self._save_metadata()
         return True
@@ -1,14 +1,29 @@
 import time
 import threading
+import logging
 import hashlib
 import json
 import os
+import sys
+import base64
+import uuid
+import random
+import collections
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum, auto
 from virtual_disk import VirtualDisk
 from network_manager import NetworkManager, TCPCommunication, MessageTypes, NetworkMessage
 
+logger = logging.getLogger(__name__)
+
+STORAGE_INFO_TTL = 1.0  # Seconds get_node_stats may reuse a storage info snapshot
+
+def _chunk_digest(data: bytes) -> str:
+    """Integrity digest for chunk data (not used for security)"""
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()
+
 class ProcessState(Enum):
     READY = auto()
     WAITING = auto()
@@ -16,7 +31,7 @@ class ProcessState(Enum):
     COMPLETED = auto()
     FAILED = auto()
 
-@dataclass
+@dataclass(slots=True)
 class Process:
     process_id: str
     name: str
@@ -33,6 +48,7 @@ class RPCService:
         self.tcp_comm = tcp_comm
         self.rpc_methods: Dict[str, Callable] = {}
         self.pending_calls: Dict[str, tuple] = {}  # call_id -> (future, timestamp)
+        self._lock = threading.Lock()
         
         # Register RPC handler
         tcp_comm.register_handler(MessageTypes.RPC_REQUEST, self._handle_rpc_request)
@@ -40,12 +56,14 @@ class RPCService:
     
     def register_method(self, method_name: str, method: Callable):
         """Register an RPC method"""
-        self.rpc_methods[method_name] = method
+        with self._lock:
+            self.rpc_methods[sys.intern(method_name)] = method
     
     def call_remote_method(self, target_ip: str, target_port: int, method_name: str, 
                           params: dict = None, timeout: float = 30.0) -> Any:  # Increased timeout
         """Call a remote method on another node"""
-        call_id = hashlib.md5(f"{self.node_id}-{method_name}-{time.time()}".encode()).hexdigest()
+        call_id = uuid.uuid4().hex
+        now = time.time()
         
         request_message = NetworkMessage(
             message_id=call_id,
@@ -58,52 +76,50 @@ class RPCService:
                 "params": params or {},
                 "source_port": self.tcp_comm.port  # Include source port for response
             },
-            timestamp=time.time(),
+            timestamp=now,
             requires_ack=True
         )
         
-        # Create a future-like object for the result
-        result_container = {"result": None, "completed": False, "error": None}
-        self.pending_calls[call_id] = (result_container, time.time())
+        # Future completed by _handle_rpc_response
+        future = Future()
+        with self._lock:
+            self.pending_calls[call_id] = (future, now)
         
         # Send the request
-        print(f"[{self.node_id}] Sending RPC request for {method_name} to {target_ip}:{target_port}")
-        success = self.tcp_comm.send_message(target_ip, target_port, request_message)
+        logger.debug("[%s] Sending RPC request for %s to %s:%s", self.node_id, method_name, target_ip, target_port)
+        success = self.tcp_comm.send_pooled_message(target_ip, target_port, request_message)
         
         if success:
-            print(f"[{self.node_id}] RPC request sent, waiting for response...")
-            # Wait for response
-            start_time = time.time()
-            while not result_container["completed"] and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            if result_container["completed"]:
-                print(f"[{self.node_id}] RPC response received for {method_name}")
-                if result_container["error"]:
-                    raise Exception(result_container["error"])
-                return result_container["result"]
-            else:
-                # Timeout
-                print(f"[{self.node_id}] RPC timeout for {method_name}")
-                del self.pending_calls[call_id]
+            logger.debug("[%s] RPC request sent, waiting for response...", self.node_id)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                logger.warning("[%s] RPC timeout for %s", self.node_id, method_name)
+                with self._lock:
+                    self.pending_calls.pop(call_id, None)
                 raise TimeoutError(f"RPC call to {method_name} timed out")
+            
+            logger.debug("[%s] RPC response received for %s", self.node_id, method_name)
+            return result
         else:
-            print(f"[{self.node_id}] Failed to send RPC request for {method_name}")
-            del self.pending_calls[call_id]
+            logger.warning("[%s] Failed to send RPC request for %s", self.node_id, method_name)
+            with self._lock:
+                self.pending_calls.pop(call_id, None)
             raise Exception("Failed to send RPC request")
     
     def _handle_rpc_request(self, message: NetworkMessage):
         """Handle incoming RPC request"""
-        print(f"[{self.node_id}] Received RPC request for {message.payload.get('method_name', 'unknown')}")
+        logger.debug("[%s] Received RPC request for %s", self.node_id, message.payload.get('method_name', 'unknown'))
         payload = message.payload
         call_id = payload["call_id"]
         method_name = payload["method_name"]
         params = payload.get("params", {})
         
         try:
-            if method_name in self.rpc_methods:
-                print(f"[{self.node_id}] Executing RPC method: {method_name}")
-                result = self.rpc_methods[method_name](**params)
+            method = self.rpc_methods.get(method_name)
+            if method is not None:
+                logger.debug("[%s] Executing RPC method: %s", self.node_id, method_name)
+                result = method(**params)
                 
                 response = NetworkMessage(
                     message_id=self.tcp_comm._generate_message_id(),
@@ -117,9 +133,9 @@ class RPCService:
                     },
                     timestamp=time.time()
                 )
-                print(f"[{self.node_id}] Sending RPC response for {method_name}")
+                logger.debug("[%s] Sending RPC response for %s", self.node_id, method_name)
             else:
-                print(f"[{self.node_id}] RPC method not found: {method_name}")
+                logger.warning("[%s] RPC method not found: %s", self.node_id, method_name)
                 response = NetworkMessage(
                     message_id=self.tcp_comm._generate_message_id(),
                     message_type=MessageTypes.RPC_RESPONSE,
@@ -135,11 +151,11 @@ class RPCService:
             
             # Send response
             target_port = message.payload.get("source_port", self.tcp_comm.port)
-            success = self.tcp_comm.send_message(message.source_ip, target_port, response)
-            print(f"[{self.node_id}] RPC response sent to {message.source_ip}:{target_port} - Success: {success}")
+            success = self.tcp_comm.send_pooled_message(message.source_ip, target_port, response)
+            logger.debug("[%s] RPC response sent to %s:%s - Success: %s", self.node_id, message.source_ip, target_port, success)
             
         except Exception as e:
-            print(f"[{self.node_id}] RPC request error: {e}")
+            logger.warning("[%s] RPC request error: %s", self.node_id, e)
             # Send error response
             response = NetworkMessage(
                 message_id=self.tcp_comm._generate_message_id(),
@@ -154,32 +170,78 @@ class RPCService:
                 timestamp=time.time()
             )
             target_port = message.payload.get("source_port", self.tcp_comm.port)
-            self.tcp_comm.send_message(message.source_ip, target_port, response)
+            self.tcp_comm.send_pooled_message(message.source_ip, target_port, response)
     
     def _handle_rpc_response(self, message: NetworkMessage):
         """Handle incoming RPC response"""
         payload = message.payload
         call_id = payload["call_id"]
         
-        if call_id in self.pending_calls:
-            result_container, _ = self.pending_calls[call_id]
-            result_container["result"] = payload["result"]
-            result_container["error"] = payload["error"]
-            result_container["completed"] = True
-            del self.pending_calls[call_id]
+        with self._lock:
+            entry = self.pending_calls.pop(call_id, None)
+        
+        if entry is not None:
+            future, _ = entry
+            if payload["error"]:
+                future.set_exception(Exception(payload["error"]))
+            else:
+                future.set_result(payload["result"])
+
+class ProcessRingBuffer:
+    """Power-of-two ring of process IDs; callers serialize access with their own lock"""
+    
+    def __init__(self, capacity: int = 1 << 14):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self._buf: List[Optional[str]] = [None] * capacity
+        self._mask = capacity - 1
+        self._head = 0  # Next slot to write
+        self._tail = 0  # Next slot to read
+    
+    def __len__(self) -> int:
+        return self._head - self._tail
+    
+    def push(self, process_id: str):
+        """Append a process ID, doubling the ring if it is full"""
+        if self._head - self._tail > self._mask:
+            self._grow()
+        self._buf[self._head & self._mask] = process_id
+        self._head += 1
+    
+    def pop(self) -> Optional[str]:
+        """Remove and return the oldest process ID, or None if empty"""
+        if self._head == self._tail:
+            return None
+        slot = self._tail & self._mask
+        process_id = self._buf[slot]
+        self._buf[slot] = None
+        self._tail += 1
+        return process_id
+    
+    def _grow(self):
+        """Double the capacity, unwrapping live entries to the front"""
+        count = len(self)
+        items = [self._buf[(self._tail + i) & self._mask] for i in range(count)]
+        capacity = (self._mask + 1) * 2
+        self._buf = items + [None] * (capacity - count)
+        self._mask = capacity - 1
+        self._tail = 0
+        self._head = count
 
 class ProcessManager:
     def __init__(self, node_id: str):
         self.node_id = node_id
         self.processes: Dict[str, Process] = {}
-        self.ready_queue: List[str] = []
+        self.ready_queue = ProcessRingBuffer()
+        self._ready_set: set = set()  # Live ready IDs; queue entries not in it are skipped
         self.waiting_processes: Dict[str, str] = {}  # process_id -> reason
         self.running = True
         self.scheduler_thread = None
+        self._cv = threading.Condition()  # Guards the ready queue; signalled when work arrives
         
     def create_process(self, name: str, task: Callable, *args, **kwargs) -> str:
         """Create a new process"""
-        process_id = hashlib.md5(f"{self.node_id}-{name}-{time.time()}".encode()).hexdigest()
+        process_id = uuid.uuid4().hex
         
         process = Process(
             process_id=process_id,
@@ -189,7 +251,10 @@ class ProcessManager:
         )
         
         self.processes[process_id] = process
-        self.ready_queue.append(process_id)
+        with self._cv:
+            self.ready_queue.push(process_id)
+            self._ready_set.add(process_id)
+            self._cv.notify()
         
         return process_id
     
@@ -199,16 +264,20 @@ class ProcessManager:
             process = self.processes[process_id]
             old_state = process.state
             
-            # Update queues based on state change
-            if old_state == ProcessState.READY and process_id in self.ready_queue:
-                self.ready_queue.remove(process_id)
+            # Update queues based on state change; the stale queue entry is dropped lazily
+            if old_state == ProcessState.READY and process_id in self._ready_set:
+                with self._cv:
+                    self._ready_set.discard(process_id)
             elif old_state == ProcessState.WAITING and process_id in self.waiting_processes:
                 del self.waiting_processes[process_id]
             
             process.state = state
             
-            if state == ProcessState.READY:
-                self.ready_queue.append(process_id)
+            if state == ProcessState.READY and process_id not in self._ready_set:
+                with self._cv:
+                    self.ready_queue.push(process_id)
+                    self._ready_set.add(process_id)
+                    self._cv.notify()
             elif state == ProcessState.WAITING and reason:
                 self.waiting_processes[process_id] = reason
             elif state == ProcessState.RUNNING:
@@ -218,29 +287,43 @@ class ProcessManager:
     
     def get_next_ready_process(self) -> Optional[str]:
         """Get the next ready process"""
-        if self.ready_queue:
-            return self.ready_queue.pop(0)
+        with self._cv:
+            while self.ready_queue:
+                process_id = self.ready_queue.pop()
+                if process_id in self._ready_set:
+                    self._ready_set.discard(process_id)
+                    return process_id
         return None
     
+    def get_ready_count(self) -> int:
+        """Number of processes waiting in the ready queue"""
+        return len(self._ready_set)
+    
+    @staticmethod
+    def _process_info(process: Process) -> Dict:
+        """Build the info dict for a process"""
+        return {
+            "process_id": process.process_id,
+            "name": process.name,
+            "state": process.state.name,
+            "created_at": process.created_at,
+            "started_at": process.started_at,
+            "completed_at": process.completed_at,
+            "result": process.result,
+            "error": process.error
+        }
+    
     def get_process_info(self, process_id: str) -> Optional[Dict]:
         """Get information about a process"""
-        if process_id in self.processes:
-            process = self.processes[process_id]
-            return {
-                "process_id": process.process_id,
-                "name": process.name,
-                "state": process.state.name,
-                "created_at": process.created_at,
-                "started_at": process.started_at,
-                "completed_at": process.completed_at,
-                "result": process.result,
-                "error": process.error
-            }
-        return None
+        process = self.processes.get(process_id)
+        if process is None:
+            return None
+        return self._process_info(process)
     
     def list_processes(self) -> List[Dict]:
         """List all processes"""
-        return [self.get_process_info(pid) for pid in self.processes.keys()]
+        # Snapshot the values so concurrent create_process calls can't break iteration
+        return [self._process_info(process) for process in list(self.processes.values())]
     
     def start_scheduler(self):
         """Start the process scheduler"""
@@ -248,19 +331,26 @@ class ProcessManager:
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
     
+    def stop_scheduler(self):
+        """Stop the process scheduler"""
+        with self._cv:
+            self.running = False
+            self._cv.notify_all()
+    
     def _scheduler_loop(self):
-        """Simple scheduler loop"""
+        """Simple scheduler loop, woken when a process becomes ready"""
         while self.running:
-            if self.ready_queue:
-                process_id = self.get_next_ready_process()
-                if process_id:
-                    self.set_process_state(process_id, ProcessState.RUNNING)
-                    # In a real implementation, we'd execute the process here
-                    # For now, just mark as completed after a short delay
-                    time.sleep(0.1)
-                    self.set_process_state(process_id, ProcessState.COMPLETED)
+            with self._cv:
+                while self.running and not self._ready_set:
+                    self._cv.wait(timeout=1.0)
             
-            time.sleep(0.1)  # Scheduler tick
+            process_id = self.get_next_ready_process()
+            if process_id:
+                self.set_process_state(process_id, ProcessState.RUNNING)
+                # In a real implementation, we'd execute the process here
+                # For now, just mark as completed after a short delay
+                time.sleep(0.1)
+                self.set_process_state(process_id, ProcessState.COMPLETED)
 
 class VirtualNode:
     def __init__(self, node_id: str, capacity_gb: int = 2, port: int = 8000, use_localhost: bool = True, shared_network_manager=None):
@@ -285,6 +375,13 @@ class VirtualNode:
         self.bytes_transferred = 0
         self.active_transfers = 0
         
+        # Chunk stores can arrive concurrently; the virtual disk is not thread-safe
+        self._storage_lock = threading.Lock()
+        
+        # Short-lived cache of virtual_disk.get_storage_info() for polled stats
+        self._storage_info_cache = None
+        self._storage_info_ts = 0.0
+        
         # Initialize network
         self._initialize_network()
         
@@ -299,11 +396,11 @@ class VirtualNode:
         
         # Initialize RPC service
         self.rpc_service = RPCService(self.node_id, self.tcp_comm)
-        print(f"[{self.node_id}] RPC service initialized")
+        logger.debug("[%s] RPC service initialized", self.node_id)
         
         # Register RPC methods
         self._register_rpc_methods()
-        print(f"[{self.node_id}] RPC methods registered")
+        logger.debug("[%s] RPC methods registered", self.node_id)
         
         print(f"[{self.node_id}] Node initialized with IP {ip}:{self.port}")
     
@@ -313,23 +410,25 @@ class VirtualNode:
             """Store a file chunk on this node"""
             try:
                 # Decode chunk data
-                chunk_bytes = bytes.fromhex(chunk_data)
+                chunk_bytes = base64.b64decode(chunk_data)
                 
                 # Verify hash
-                calculated_hash = hashlib.md5(chunk_bytes).hexdigest()
+                calculated_hash = _chunk_digest(chunk_bytes)
                 if calculated_hash != chunk_hash:
                     return {"success": False, "error": "Hash mismatch"}
                 
-                # Allocate storage
-                allocated_blocks = self.virtual_disk.allocate_storage(
-                    f"{file_id}_chunk", f"{file_id}_chunk", len(chunk_bytes)
-                )
-                
-                if allocated_blocks is None:
-                    return {"success": False, "error": "Insufficient storage"}
-                
-                # Write data
-                success = self.virtual_disk.write_data(f"{file_id}_chunk", chunk_bytes)
+                with self._storage_lock:
+                    # Allocate storage
+                    allocated_blocks = self.virtual_disk.allocate_storage(
+                        f"{file_id}_chunk", f"{file_id}_chunk", len(chunk_bytes)
+                    )
+                    self._storage_info_ts = 0.0
+                    
+                    if allocated_blocks is None:
+                        return {"success": False, "error": "Insufficient storage"}
+                    
+                    # Write data
+                    success = self.virtual_disk.write_data(f"{file_id}_chunk", chunk_bytes)
                 
                 if success:
                     self.files_uploaded += 1
@@ -350,8 +449,8 @@ class VirtualNode:
                 if data is None:
                     return {"success": False, "error": "Chunk not found"}
                 
-                chunk_hash = hashlib.md5(data).hexdigest()
-                chunk_data = data.hex()
+                chunk_hash = _chunk_digest(data)
+                chunk_data = base64.b64encode(data).decode()
                 
                 self.files_downloaded += 1
                 self.bytes_transferred += len(data)
@@ -407,13 +506,6 @@ class VirtualNode:
     def distribute_file(self, file_path: str, replication_factor: int = 2) -> dict:
         """Distribute a file across multiple nodes"""
         try:
-            # Read the file
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
-            file_id = hashlib.md5(file_data).hexdigest()
-            file_size = len(file_data)
-            
             # Get all available nodes (including self)
             all_nodes = list(self.network_manager.nodes.keys())
             available_nodes = [node for node in all_nodes if node != self.node_id]
@@ -425,51 +517,108 @@ class VirtualNode:
             # Adjust replication factor based on available nodes
             actual_replication = min(replication_factor, len(available_nodes))
             
-            # Split file into chunks
+            # First pass: hash the file through one reusable buffer
             chunk_size = 1024 * 1024  # 1MB chunks
-            chunks = []
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            hasher = hashlib.md5(usedforsecurity=False)
+            file_size = 0
+            
+            with open(file_path, 'rb') as f:
+                while n := f.readinto(buffer):
+                    hasher.update(view[:n])
+                    file_size += n
             
-            for i in range(0, len(file_data), chunk_size):
-                chunk_data = file_data[i:i + chunk_size]
-                chunk_id = f"{file_id}_chunk_{i // chunk_size}"
-                chunks.append({
-                    "chunk_id": chunk_id,
-                    "data": chunk_data,
-                    "chunk_index": i // chunk_size
-                })
+            file_id = hasher.hexdigest()
+            filename = os.path.basename(file_path)
+            chunk_count = -(-file_size // chunk_size)
             
             # Distribute chunks to different nodes
             chunk_distribution = {}
             successful_distributions = 0
             
-            for i, chunk in enumerate(chunks):
-                # Select target node using round-robin
-                target_node = available_nodes[i % len(available_nodes)]
+            # Second pass: store chunks on target nodes in parallel, keeping a
+            # bounded in-flight window and topping it up as completions arrive.
+            # Each chunk is encoded before the buffer is reused, so only the
+            # window's encoded payloads are held in memory.
+            max_in_flight = 64
+            results = [None] * chunk_count
+            targets = [None] * chunk_count
+            in_flight = {}  # future -> (chunk index, target node, params, attempt)
+            next_index = 0
+            
+            # Spread placement over a shuffled ring of nodes and stop picking
+            # nodes that keep failing
+            node_ring = collections.deque(random.sample(available_nodes, len(available_nodes)))
+            node_failures = collections.Counter()
+            max_node_failures = 3
+            
+            def next_target(exclude: Optional[str] = None) -> Optional[str]:
+                for _ in range(len(node_ring)):
+                    node = node_ring[0]
+                    node_ring.rotate(-1)
+                    if node != exclude and node_failures[node] < max_node_failures:
+                        return node
+                return None
+            
+            with open(file_path, 'rb') as f, \
+                    ThreadPoolExecutor(max_workers=min(chunk_count, 32) or 1) as executor:
                 
-                # Store chunk on target node
-                chunk_hash = hashlib.md5(chunk["data"]).hexdigest()
-                result = self.call_remote_method(
-                    target_node, 
-                    "store_file_chunk",
-                    {
-                        "file_id": file_id,
-                        "chunk_data": chunk["data"].hex(),
-                        "chunk_hash": chunk_hash
-                    }
-                )
+                def submit(index: int, target_node: str, params: dict, attempt: int):
+                    targets[index] = target_node
+                    future = executor.submit(self.call_remote_method, target_node, "store_file_chunk", params)
+                    in_flight[future] = (index, target_node, params, attempt)
                 
+                while next_index < chunk_count or in_flight:
+                    while next_index < chunk_count and len(in_flight) < max_in_flight:
+                        chunk_data = view[:f.readinto(buffer)]
+                        target_node = next_target()
+                        if target_node is None:
+                            results[next_index] = {"success": False, "error": "No healthy nodes available"}
+                        else:
+                            submit(next_index, target_node, {
+                                "file_id": file_id,
+                                "chunk_data": base64.b64encode(chunk_data).decode(),
+                                "chunk_hash": _chunk_digest(chunk_data)
+                            }, 0)
+                        next_index += 1
+                    
+                    if not in_flight:
+                        continue
+                    
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, target_node, params, attempt = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = {"success": False, "error": str(e)}
+                        
+                        if not result["success"]:
+                            node_failures[target_node] += 1
+                            # Retry once on a different node
+                            retry_node = next_target(exclude=target_node) if attempt == 0 else None
+                            if retry_node is not None:
+                                logger.warning("Retrying chunk %d on %s after failure on %s: %s",
+                                               index, retry_node, target_node, result.get('error', 'Unknown error'))
+                                submit(index, retry_node, params, attempt + 1)
+                                continue
+                        results[index] = result
+            
+            for i, (result, target_node) in enumerate(zip(results, targets)):
+                chunk_id = f"{file_id}_chunk_{i}"
                 if result["success"]:
-                    chunk_distribution[chunk["chunk_id"]] = target_node
+                    chunk_distribution[chunk_id] = target_node
                     successful_distributions += 1
                 else:
-                    print(f"Failed to store chunk {chunk['chunk_id']} on {target_node}: {result.get('error', 'Unknown error')}")
+                    logger.warning("Failed to store chunk %s on %s: %s", chunk_id, target_node, result.get('error', 'Unknown error'))
             
             # Store metadata on current node
             metadata = {
                 "file_id": file_id,
-                "filename": os.path.basename(file_path),
+                "filename": filename,
                 "file_size": file_size,
-                "chunk_count": len(chunks),
+                "chunk_count": chunk_count,
                 "chunk_distribution": chunk_distribution,
                 "created_at": time.time()
             }
@@ -480,9 +629,9 @@ class VirtualNode:
             return {
                 "success": True,
                 "file_id": file_id,
-                "filename": os.path.basename(file_path),
+                "filename": filename,
                 "file_size": file_size,
-                "chunk_count": len(chunks),
+                "chunk_count": chunk_count,
                 "chunks_distributed": successful_distributions,
                 "chunk_distribution": chunk_distribution,
                 "replication_factor": actual_replication
@@ -493,7 +642,12 @@ class VirtualNode:
     
     def get_node_stats(self) -> Dict:
         """Get comprehensive node statistics"""
-        storage_info = self.virtual_disk.get_storage_info()
+        now = time.monotonic()
+        storage_info = self._storage_info_cache
+        if storage_info is None or now - self._storage_info_ts >= STORAGE_INFO_TTL:
+            storage_info = self.virtual_disk.get_storage_info()
+            self._storage_info_cache = storage_info
+            self._storage_info_ts = now
         
         return {
             "node_id": self.node_id,
@@ -510,7 +664,7 @@ class VirtualNode:
             },
             "processes": {
                 "total": len(self.process_manager.processes),
-                "ready": len(self.process_manager.ready_queue),
+                "ready": self.process_manager.get_ready_count(),
                 "waiting": len(self.process_manager.waiting_processes)
             }
         }
@@ -518,7 +672,7 @@ class VirtualNode:
     def shutdown(self):
         """Shutdown the node gracefully"""
         self.is_active = False
-        self.process_manager.running = False
+        self.process_manager.stop_scheduler()
         if self.network_manager:
             self.network_manager.stop()
         print(f"[{self.node_id}] Node shutdown complete")
@@ -2,7 +2,10 @@ import os
 import time
 import threading
 import json
+import sys
 import hashlib
+import functools
+from collections import defaultdict, deque
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum, auto
@@ -17,7 +20,7 @@ class FileSystemType(Enum):
     VIRTUAL_FS = "vfs"
     DISTRIBUTED_FS = "dfs"
 
-@dataclass
+@dataclass(slots=True)
 class VirtualFile:
     path: str
     name: str
@@ -31,7 +34,7 @@ class VirtualFile:
     owner: str = "root"
     group: str = "root"
 
-@dataclass
+@dataclass(slots=True)
 class VirtualProcess:
     pid: int
     name: str
@@ -44,11 +47,22 @@ class VirtualProcess:
     parent_pid: Optional[int] = None
     command: str = ""
 
+def _path_id(prefix: str, path: str) -> str:
+    """Stable ID for a filesystem entry derived from its path (not used for security)"""
+    return f"{prefix}_{hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()}"
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_relative_path(current_directory: str, path: str) -> str:
+    """Normalize a relative path against a working directory"""
+    return os.path.normpath(os.path.join(current_directory, path)).replace("\\", "/")
+
 class VirtualFileSystem:
     def __init__(self, virtual_disk: VirtualDisk, node_id: str):
         self.virtual_disk = virtual_disk
         self.node_id = node_id
         self.files: Dict[str, VirtualFile] = {}  # path -> VirtualFile
+        # parent path -> child paths; a dict keeps listings in creation order
+        self.children: Dict[str, Dict[str, None]] = defaultdict(dict)
         self.root_directory = "/"
         self.current_directory = "/"
         
@@ -83,7 +97,7 @@ class VirtualFileSystem:
         if path in self.files:
             return False
         
-        parent_path = os.path.dirname(path)
+        parent_path = sys.intern(os.path.dirname(path))
         dir_name = os.path.basename(path)
         
         # Check if parent exists
@@ -96,12 +110,13 @@ class VirtualFileSystem:
             size=0,
             created_at=time.time(),
             modified_at=time.time(),
-            file_id=f"dir_{hashlib.md5(path.encode()).hexdigest()}",
+            file_id=_path_id("dir", path),
             is_directory=True,
             parent_path=parent_path
         )
         
         self.files[path] = dir_file
+        self.children[parent_path][path] = None
         return True
     
     def create_file(self, path: str, content: bytes = b"") -> bool:
@@ -109,7 +124,7 @@ class VirtualFileSystem:
         if path in self.files:
             return False
         
-        parent_path = os.path.dirname(path)
+        parent_path = sys.intern(os.path.dirname(path))
         file_name = os.path.basename(path)
         
         # Check if parent directory exists
@@ -117,7 +132,7 @@ class VirtualFileSystem:
             return False
         
         # Allocate storage on virtual disk
-        file_id = f"file_{hashlib.md5(path.encode()).hexdigest()}"
+        file_id = _path_id("file", path)
         allocated_blocks = self.virtual_disk.allocate_storage(file_id, file_name, len(content))
         
         if allocated_blocks is None:
@@ -144,6 +159,7 @@ class VirtualFileSystem:
         )
         
         self.files[path] = virtual_file
+        self.children[parent_path][path] = None
         return True
     
     def read_file(self, path: str) -> Optional[bytes]:
@@ -185,8 +201,7 @@ class VirtualFileSystem:
         
         if file_obj.is_directory:
             # Check if directory is empty
-            children = [f for f in self.files.values() if f.parent_path == path]
-            if children:
+            if self.children.get(path):
                 return False  # Directory not empty
         
         # Delete from virtual disk
@@ -195,6 +210,8 @@ class VirtualFileSystem:
         
         # Remove from filesystem
         del self.files[path]
+        self.children[file_obj.parent_path].pop(path, None)
+        self.children.pop(path, None)
         return True
     
     def list_directory(self, path: str) -> List[VirtualFile]:
@@ -202,7 +219,8 @@ class VirtualFileSystem:
         if path not in self.files or not self.files[path].is_directory:
             return []
         
-        return [f for f in self.files.values() if f.parent_path == path]
+        files = self.files
+        return [files[child] for child in self.children.get(path, ())]
     
     def file_exists(self, path: str) -> bool:
         """Check if file exists"""
@@ -228,14 +246,14 @@ class VirtualFileSystem:
         if path.startswith("/"):
             return path
         else:
-            return os.path.normpath(os.path.join(self.current_directory, path)).replace("\\", "/")
+            return _resolve_relative_path(self.current_directory, path)
 
 class VirtualProcessManager:
     def __init__(self):
         self.processes: Dict[int, VirtualProcess] = {}
         self.next_pid = 1
         self.running_processes: Dict[int, threading.Thread] = {}
-        self.process_table: Dict[str, List[int]] = {}  # process_name -> list of pids
+        self.process_table: Dict[str, Dict[int, None]] = {}  # process_name -> live pids, in creation order
         
     def create_process(self, name: str, command: str, process_type: ProcessType = ProcessType.USER,
                       priority: int = 5, parent_pid: Optional[int] = None) -> int:
@@ -257,9 +275,7 @@ class VirtualProcessManager:
         self.processes[pid] = process
         
         # Add to process table
-        if name not in self.process_table:
-            self.process_table[name] = []
-        self.process_table[name].append(pid)
+        self.process_table.setdefault(name, {})[pid] = None
         
         return pid
     
@@ -282,6 +298,7 @@ class VirtualProcessManager:
                 process.state = "FAILED"
                 print(f"Process {pid} failed: {e}")
             finally:
+                self.process_table.get(process.name, {}).pop(pid, None)
                 if pid in self.running_processes:
                     del self.running_processes[pid]
         
@@ -299,6 +316,7 @@ class VirtualProcessManager:
         process = self.processes[pid]
         if process.state == "RUNNING":
             process.state = "TERMINATED"
+            self.process_table.get(process.name, {}).pop(pid, None)
             if pid in self.running_processes:
                 # Note: In a real OS, we'd need proper thread termination
                 del self.running_processes[pid]
@@ -307,10 +325,14 @@ class VirtualProcessManager:
     
     def get_process_info(self, pid: int) -> Optional[Dict]:
         """Get process information"""
-        if pid not in self.processes:
+        process = self.processes.get(pid)
+        if process is None:
             return None
-        
-        process = self.processes[pid]
+        return self._process_info(process)
+    
+    @staticmethod
+    def _process_info(process: VirtualProcess) -> Dict:
+        """Build the info dict for a process"""
         return {
             "pid": process.pid,
             "name": process.name,
@@ -326,13 +348,17 @@ class VirtualProcessManager:
     
     def list_processes(self) -> List[Dict]:
         """List all processes"""
-        return [self.get_process_info(pid) for pid in sorted(self.processes.keys())]
+        # PIDs are allocated in increasing order, so insertion order is PID order.
+        # Snapshot first: create_process may insert while the list is built.
+        return [self._process_info(process) for process in list(self.processes.values())]
     
     def get_process_by_name(self, name: str) -> List[int]:
         """Get all PIDs for a process name"""
-        return self.process_table.get(name, [])
+        return list(self.process_table.get(name, ()))
 
 class VirtualOS:
+    DF_HEADER = "Filesystem      Size  Used Avail Use% Mounted on"
+    
     def __init__(self, node_id: str, virtual_disk: VirtualDisk):
         self.node_id = node_id
         self.boot_time = time.time()
@@ -346,11 +372,12 @@ class VirtualOS:
         # System information
         self.kernel_version = "CloudOS-1.0.0"
         self.hostname = f"{node_id}-os"
-        self.uptime = 0
+        self._boot_mono: Optional[float] = None
+        self._halt_mono: Optional[float] = None
         
         # System services
         self.services: Dict[str, Dict] = {}
-        self.system_logs: List[Dict] = []
+        self.system_logs: deque = deque(maxlen=1000)  # Keeps only the last 1000 entries
         
         # Shell interface
         self.shell_commands: Dict[str, Callable] = {}
@@ -367,11 +394,8 @@ class VirtualOS:
         self._create_system_processes()
         
         self.is_running = True
-        self.uptime = 0
-        
-        # Start uptime counter
-        uptime_thread = threading.Thread(target=self._uptime_counter, daemon=True)
-        uptime_thread.start()
+        self._boot_mono = time.monotonic()
+        self._halt_mono = None
         
         print(f"[{self.node_id}] CloudOS booted successfully")
         print(f"[{self.node_id}] Hostname: {self.hostname}")
@@ -379,11 +403,13 @@ class VirtualOS:
         
         return True
     
-    def _uptime_counter(self):
-        """Update uptime counter"""
-        while self.is_running:
-            time.sleep(1)
-            self.uptime = time.time() - self.boot_time
+    @property
+    def uptime(self) -> float:
+        """Seconds since boot, frozen at shutdown"""
+        if self._boot_mono is None:
+            return 0
+        end = self._halt_mono if self._halt_mono is not None else time.monotonic()
+        return end - self._boot_mono
     
     def _start_system_services(self):
         """Start essential system services"""
@@ -437,6 +463,7 @@ class VirtualOS:
             "clear": self._cmd_clear,
             "exit": self._cmd_exit,
         }
+        self._help_text = f"Available commands: {', '.join(sorted(self.shell_commands))}"
     
     def execute_command(self, command_line: str) -> str:
         """Execute a shell command"""
@@ -461,20 +488,10 @@ class VirtualOS:
         path = self.filesystem.get_absolute_path(args[0]) if args else self.filesystem.current_directory
         files = self.filesystem.list_directory(path)
         
-        if not files:
-            return ""
-        
-        output = []
-        for file_obj in files:
-            file_type = "d" if file_obj.is_directory else "-"
-            permissions = file_obj.permissions
-            size = file_obj.size
-            name = file_obj.name
-            modified = time.ctime(file_obj.modified_at)
-            
-            output.append(f"{file_type}{permissions} {size:>8} {name}")
-        
-        return "\n".join(output)
+        return "\n".join(
+            f"{'d' if f.is_directory else '-'}{f.permissions} {f.size:>8} {f.name}"
+            for f in files
+        )
     
     def _cmd_cd(self, args: List[str]) -> str:
         """Change directory"""
@@ -532,11 +549,10 @@ class VirtualOS:
     
     def _cmd_ps(self, args: List[str]) -> str:
         """List processes"""
-        processes = self.process_manager.list_processes()
-        
+        # Format straight from the process records rather than per-process info dicts
         output = ["PID  NAME           STATE    TYPE     CPU_TIME"]
-        for proc in processes:
-            output.append(f"{proc['pid']:<5} {proc['name']:<15} {proc['state']:<8} {proc['type']:<8} {proc['cpu_time']:.2f}")
+        for proc in list(self.process_manager.processes.values()):
+            output.append(f"{proc.pid:<5} {proc.name:<15} {proc.state:<8} {proc.process_type.name:<8} {proc.cpu_time:.2f}")
         
         return "\n".join(output)
     
@@ -558,17 +574,14 @@ class VirtualOS:
         """Display disk usage"""
         storage_info = self.virtual_disk.get_storage_info()
         
-        output = [
-            f"Filesystem      Size  Used Avail Use% Mounted on",
+        return (
+            f"{self.DF_HEADER}\n"
             f"CloudOS         {storage_info['capacity_gb']:.1f}G {storage_info['used_storage_gb']:.1f}G {storage_info['free_storage_gb']:.1f}G {storage_info['utilization_percent']:.0f}% /"
-        ]
-        
-        return "\n".join(output)
+        )
     
     def _cmd_help(self, args: List[str]) -> str:
         """Display help"""
-        commands = list(self.shell_commands.keys())
-        return f"Available commands: {', '.join(sorted(commands))}"
+        return self._help_text
     
     def _cmd_clear(self, args: List[str]) -> str:
         """Clear screen"""
@@ -586,10 +599,6 @@ class VirtualOS:
             "message": message
         }
         self.system_logs.append(log_entry)
-        
-        # Keep only last 1000 log entries
-        if len(self.system_logs) > 1000:
-            self.system_logs = self.system_logs[-1000:]
     
     def get_system_info(self) -> Dict:
         """Get system information"""
@@ -618,6 +627,8 @@ class VirtualOS:
             self.services[service_name]["status"] = "stopped"
         
         self.is_running = False
+        if self._boot_mono is not None:
+            self._halt_mono = time.monotonic()
         self._log("system", "CloudOS shutdown complete")
         
         print(f"[{self.node_id}] CloudOS shutdown complete")
@@ -1,49 +1,107 @@
+import asyncio
 import bcrypt
 import grpc
 import os
 import json
-from concurrent import futures
-from datetime import datetime, timedelta
+import threading
+import time
+import heapq
+import hmac
+import logging
+from datetime import datetime
 import jwt
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import cloudsecurity_pb2
 import cloudsecurity_pb2_grpc
 from utils import send_otp, hash_password, generate_otp
 
+logger = logging.getLogger(__name__)
+
 # Constants
 CREDENTIALS_FILE = 'credentials'
 USERS_FILE = 'users.json'
 JWT_SECRET = 'your_jwt_secret_key_here'  # In production, use environment variables
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_MINUTES = 30
+_JWT_KEY = JWT_SECRET.encode()  # Encoded once instead of on every jwt.encode call
+OTP_TTL_SECONDS = 5 * 60
+ENROLLMENT_OTP_TTL_SECONDS = 10 * 60
 
 # In-memory storage for OTPs and sessions
-active_otps: Dict[str, Dict[str, str]] = {}  # {username: {'otp': '123456', 'expires_at': 'timestamp'}}
+active_otps: Dict[str, Dict] = {}  # {username: {'otp': '123456', 'expires_at': monotonic_deadline}}
 sessions: Dict[str, Dict] = {}  # {session_id: {user_data}}
 
+# Expiry index for active_otps so stale entries are dropped without scanning the dict
+_otp_expiry_heap: List[Tuple[float, str]] = []  # (expires_at, username)
+_otps_lock = threading.Lock()
+
+def store_otp(username: str, otp: str, ttl_seconds: float, purpose: Optional[str] = None) -> None:
+    now = time.monotonic()
+    expires_at = now + ttl_seconds
+    otp_data = {'otp': otp, 'expires_at': expires_at}
+    if purpose:
+        otp_data['purpose'] = purpose
+    with _otps_lock:
+        # Drop entries whose OTP expired and was never verified
+        while _otp_expiry_heap and _otp_expiry_heap[0][0] < now:
+            expired_at, expired_user = heapq.heappop(_otp_expiry_heap)
+            stale = active_otps.get(expired_user)
+            if stale is not None and stale['expires_at'] == expired_at:
+                del active_otps[expired_user]
+        active_otps[username] = otp_data
+        heapq.heappush(_otp_expiry_heap, (expires_at, username))
+
+# Parsed users.json, reloaded only when the file's mtime changes
+_users_cache: Optional[dict] = None
+_users_mtime: Optional[int] = None
+_users_lock = threading.Lock()
+# Serializes read-modify-write of users.json across handlers; file I/O runs off the event loop
+_users_write_lock = asyncio.Lock()
+
 def load_users() -> dict:
-    if not os.path.exists(USERS_FILE):
-        return {}
-    with open(USERS_FILE, 'r') as f:
-        return json.load(f)
+    global _users_cache, _users_mtime
+    try:
+        mtime = os.stat(USERS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _users_lock:
+        if _users_cache is None or mtime != _users_mtime:
+            if mtime is None:
+                _users_cache = {}
+            else:
+                with open(USERS_FILE, 'r') as f:
+                    _users_cache = json.load(f)
+            _users_mtime = mtime
+        return _users_cache
 
 def save_users(users: dict) -> None:
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    global _users_cache, _users_mtime
+    with _users_lock:
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_file = f'{USERS_FILE}.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(users, f, indent=2)
+            os.replace(tmp_file, USERS_FILE)
+        except Exception:
+            # Callers mutate the cached dict before saving; drop it so the next load rereads the file
+            _users_cache = None
+            raise
+        _users_cache = users
+        _users_mtime = os.stat(USERS_FILE).st_mtime_ns
 
 def create_jwt_token(username: str) -> str:
-    expiration = datetime.utcnow() + timedelta(minutes=JWT_EXPIRATION_MINUTES)
     payload = {
         'sub': username,
-        'exp': expiration
+        'exp': int(time.time()) + JWT_EXPIRATION_MINUTES * 60
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
 
 class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
-    def login(self, request, context) -> cloudsecurity_pb2.Response:
-        print(f'[LOGIN] New login attempt for user: {request.username}')
-        users = load_users()
+    async def login(self, request, context) -> cloudsecurity_pb2.Response:
+        logger.info('[LOGIN] New login attempt for user: %s', request.username)
+        users = await asyncio.to_thread(load_users)
         
         if request.username not in users:
             return cloudsecurity_pb2.Response(
@@ -52,7 +110,11 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             )
         
         user = users[request.username]
-        if not bcrypt.checkpw(request.password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        # bcrypt is CPU-bound; keep it off the event loop
+        password_ok = await asyncio.to_thread(
+            bcrypt.checkpw, request.password.encode('utf-8'), user['password_hash'].encode('utf-8')
+        )
+        if not password_ok:
             return cloudsecurity_pb2.Response(
                 success=False,
                 message="Invalid username or password"
@@ -60,10 +122,7 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
         
         # Generate and send OTP
         otp = generate_otp()
-        active_otps[request.username] = {
-            'otp': otp,
-            'expires_at': (datetime.utcnow() + timedelta(minutes=5)).isoformat()
-        }
+        store_otp(request.username, otp, OTP_TTL_SECONDS)
         
         send_otp(user['email'], otp)
         
@@ -72,9 +131,9 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             message="OTP sent to your registered email"
         )
 
-    def signup(self, request, context) -> cloudsecurity_pb2.Response:
-        print(f'[SIGNUP] New signup attempt for user: {request.username}')
-        users = load_users()
+    async def signup(self, request, context) -> cloudsecurity_pb2.Response:
+        logger.info('[SIGNUP] New signup attempt for user: %s', request.username)
+        users = await asyncio.to_thread(load_users)
         
         if request.username in users:
             return cloudsecurity_pb2.Response(
@@ -83,27 +142,33 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             )
         
         # Hash the password
-        password_hash = hash_password(request.password)
-        
-        # Create new user
-        users[request.username] = {
-            'username': request.username,
-            'email': request.email,
-            'full_name': request.full_name,
-            'password_hash': password_hash,
-            'is_active': False,
-            'created_at': datetime.utcnow().isoformat()
-        }
+        password_hash = await asyncio.to_thread(hash_password, request.password)
         
-        save_users(users)
+        async with _users_write_lock:
+            # Reload: another signup may have claimed the name, or users.json
+            # changed on disk, while we were hashing
+            users = await asyncio.to_thread(load_users)
+            if request.username in users:
+                return cloudsecurity_pb2.Response(
+                    success=False,
+                    message="Username already exists"
+                )
+            
+            # Create new user
+            users[request.username] = {
+                'username': request.username,
+                'email': request.email,
+                'full_name': request.full_name,
+                'password_hash': password_hash,
+                'is_active': False,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            
+            await asyncio.to_thread(save_users, users)
         
         # Send enrollment email with OTP
         otp = generate_otp()
-        active_otps[request.username] = {
-            'otp': otp,
-            'expires_at': (datetime.utcnow() + timedelta(minutes=10)).isoformat(),
-            'purpose': 'enrollment'
-        }
+        store_otp(request.username, otp, ENROLLMENT_OTP_TTL_SECONDS, 'enrollment')
         
         send_otp(request.email, otp)
         
@@ -112,32 +177,29 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             message="Account created. Please verify your email with the OTP sent to your inbox."
         )
     
-    def enroll(self, request, context) -> cloudsecurity_pb2.Response:
-        print(f'[ENROLL] Enrollment request for user: {request.username}')
-        users = load_users()
-        
-        if request.username not in users:
-            return cloudsecurity_pb2.Response(
-                success=False,
-                message="User not found"
-            )
-        
-        # Update user enrollment info
-        users[request.username].update({
-            'email': request.email,
-            'phone': request.phone,
-            'updated_at': datetime.utcnow().isoformat()
-        })
-        
-        save_users(users)
+    async def enroll(self, request, context) -> cloudsecurity_pb2.Response:
+        logger.info('[ENROLL] Enrollment request for user: %s', request.username)
+        async with _users_write_lock:
+            users = await asyncio.to_thread(load_users)
+            
+            if request.username not in users:
+                return cloudsecurity_pb2.Response(
+                    success=False,
+                    message="User not found"
+                )
+            
+            # Update user enrollment info
+            users[request.username].update({
+                'email': request.email,
+                'phone': request.phone,
+                'updated_at': datetime.utcnow().isoformat()
+            })
+            
+            await asyncio.to_thread(save_users, users)
         
         # Send OTP for verification
         otp = generate_otp()
-        active_otps[request.username] = {
-            'otp': otp,
-            'expires_at': (datetime.utcnow() + timedelta(minutes=5)).isoformat(),
-            'purpose': 'enrollment_verification'
-        }
+        store_otp(request.username, otp, OTP_TTL_SECONDS, 'enrollment_verification')
         
         send_otp(request.email, otp)
         
@@ -146,60 +208,54 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             message="Enrollment information updated. Please verify with the OTP sent to your email."
         )
     
-    def verifyOtp(self, request, context) -> cloudsecurity_pb2.Response:
-        print(f'\n[OTP] Verification attempt for user: {request.username}')
-        print(f'[DEBUG] Active OTPs: {active_otps}')
-        print(f'[DEBUG] User provided OTP: {request.otp}')
+    async def verifyOtp(self, request, context) -> cloudsecurity_pb2.Response:
+        logger.info('[OTP] Verification attempt for user: %s', request.username)
         
         if request.username not in active_otps:
-            print(f'[DEBUG] No active OTP found for user: {request.username}')
+            logger.debug('No active OTP found for user: %s', request.username)
             return cloudsecurity_pb2.Response(
                 success=False,
                 message="No active OTP found for this user"
             )
         
         otp_data = active_otps[request.username]
-        print(f'[DEBUG] Stored OTP data: {otp_data}')
         
         # Check if OTP is expired
-        expiry_time = datetime.fromisoformat(otp_data['expires_at'])
-        current_time = datetime.utcnow()
-        print(f'[DEBUG] Current time: {current_time}')
-        print(f'[DEBUG] OTP expires at: {expiry_time}')
-        
-        if expiry_time < current_time:
-            print('[DEBUG] OTP has expired')
-            del active_otps[request.username]
+        remaining = otp_data['expires_at'] - time.monotonic()
+        logger.debug('OTP for %s expires in %.1fs', request.username, remaining)
+        
+        if remaining < 0:
+            logger.debug('OTP for %s has expired', request.username)
+            active_otps.pop(request.username, None)
             return cloudsecurity_pb2.Response(
                 success=False,
                 message="OTP has expired. Please request a new one."
             )
         
         # Verify OTP
-        print(f'[DEBUG] Comparing OTPs - Expected: {otp_data["otp"]}, Got: {request.otp}')
-        if str(otp_data['otp']) != str(request.otp):
-            print(f'[DEBUG] OTP mismatch')
+        # Constant-time compare; bytes so non-ASCII input can't raise
+        if not hmac.compare_digest(otp_data['otp'].encode(), request.otp.encode()):
+            logger.debug('OTP mismatch for %s', request.username)
             return cloudsecurity_pb2.Response(
                 success=False,
                 message=f"Invalid OTP. Please try again."
             )
             
-        print('[DEBUG] OTP verification successful')
-        
-        # OTP is valid
-        users = load_users()
-        user = users.get(request.username)
+        logger.debug('OTP verification successful for %s', request.username)
         
-        if not user:
-            return cloudsecurity_pb2.Response(
-                success=False,
-                message="User not found"
-            )
-        
-        # Handle different OTP purposes
+        # OTP is valid; the user existed when it was issued, so only
+        # activation needs to touch the user store
         if otp_data.get('purpose') == 'enrollment':
-            users[request.username]['is_active'] = True
-            save_users(users)
+            async with _users_write_lock:
+                users = await asyncio.to_thread(load_users)
+                user = users.get(request.username)
+                if not user:
+                    return cloudsecurity_pb2.Response(
+                        success=False,
+                        message="User not found"
+                    )
+                user['is_active'] = True
+                await asyncio.to_thread(save_users, users)
             message = "Account activated successfully!"
         elif otp_data.get('purpose') == 'enrollment_verification':
             message = "Enrollment verified successfully!"
@@ -210,7 +266,7 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
         token = create_jwt_token(request.username)
         
         # Clean up used OTP
-        del active_otps[request.username]
+        active_otps.pop(request.username, None)
         
         return cloudsecurity_pb2.Response(
             success=True,
@@ -218,14 +274,23 @@ class UserServiceSkeleton(cloudsecurity_pb2_grpc.UserServiceServicer):
             token=token
         )
 
-def run():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+async def serve():
+    # Accept the test client's keepalive pings on idle connections instead of sending GOAWAY
+    server = grpc.aio.server(options=[
+        ('grpc.keepalive_permit_without_calls', 1),
+        # Below the client's 30s keepalive_time, so its unlimited idle pings never count as strikes
+        ('grpc.http2.min_ping_interval_without_data_ms', 20000),
+    ])
     cloudsecurity_pb2_grpc.add_UserServiceServicer_to_server(UserServiceSkeleton(), server)
     server.add_insecure_port('[::]:51234')
     print('Starting Server on port 51234 ............', end='')
-    server.start()
+    await server.start()
     print('[OK]')
-    server.wait_for_termination()
+    await server.wait_for_termination()
+
+def run():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    asyncio.run(serve())
 
 if __name__ == '__main__':
     run()
\ No newline at end of file
@@ -1,7 +1,64 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+import threading
+import time
 import grpc
+from grpc import aio
 import cloudsecurity_pb2
 import cloudsecurity_pb2_grpc
 
+# Ping the server while the user sits at a prompt so the idle connection isn't silently dropped
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    # gRPC stops pinging after 2 pings with no data by default; keep pinging for the whole idle session
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# Set QF_QUIET=1 when scripting the client for load tests to skip response output
+QUIET = os.environ.get('QF_QUIET') == '1'
+
+class ChannelPool:
+    """Round-robins stubs over several channels so concurrent calls don't share one HTTP/2 connection"""
+    
+    def __init__(self, target, size=4, options=CHANNEL_OPTIONS, channel_factory=grpc.insecure_channel):
+        # A local subchannel pool gives each channel its own TCP connection
+        channel_options = list(options) + [('grpc.use_local_subchannel_pool', 1)]
+        self.channels = [channel_factory(target, options=channel_options) for _ in range(size)]
+        self._stubs = itertools.cycle([cloudsecurity_pb2_grpc.UserServiceStub(ch) for ch in self.channels])
+        self._lock = threading.Lock()
+    
+    def next_stub(self):
+        with self._lock:
+            return next(self._stubs)
+    
+    def wait_ready(self, timeout=5):
+        """Connect every channel up front; raises grpc.FutureTimeoutError if the server is unreachable"""
+        # Start all connection attempts before waiting so they overlap
+        futures = [grpc.channel_ready_future(channel) for channel in self.channels]
+        for future in futures:
+            future.result(timeout=timeout)
+    
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+    
+    async def aclose(self):
+        await asyncio.gather(*(channel.close() for channel in self.channels))
+
+# Operation name -> (stub method, request message) for the non-interactive commands
+OPERATIONS = {
+    'signup': ('signup', cloudsecurity_pb2.SignupRequest),
+    'login': ('login', cloudsecurity_pb2.LoginRequest),
+    'enroll': ('enroll', cloudsecurity_pb2.EnrollRequest),
+}
+
 def print_menu():
     print("\n=== Cloud Security Test Client ===")
     print("1. Sign Up")
@@ -82,32 +139,39 @@ def test_verify_otp(stub, username, operation):
             username=username,
             otp=otp
         ))
-        print(f"\n[RESPONSE] {response.message}")
-        if response.success and response.token:
-            print(f"[AUTH TOKEN] {response.token[:20]}...")
+        if not QUIET:
+            lines = [f"\n[RESPONSE] {response.message}"]
+            if response.success and response.token:
+                token = response.token
+                lines.append(f"[AUTH TOKEN] {token if len(token) <= 23 else token[:20] + '...'}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         return response.success
     except Exception as e:
         print(f"Error during OTP verification: {e}")
     return False
 
-def main():
-    # Create a gRPC channel and stub
-    channel = grpc.insecure_channel('localhost:51234')
-    stub = cloudsecurity_pb2_grpc.UserServiceStub(channel)
+def interactive(target):
+    # Create a pool of gRPC channels; each operation takes the next stub
+    pool = ChannelPool(target)
     
     print("\n=== Cloud Security Test Client ===")
-    print("Make sure the server is running on port 51234")
+    try:
+        pool.wait_ready()
+    except grpc.FutureTimeoutError:
+        print(f"Could not connect to the server on {target}; make sure it is running")
+        pool.close()
+        return 1
     
     while True:
         try:
             choice = print_menu()
             
             if choice == '1':
-                test_signup(stub)
+                test_signup(pool.next_stub())
             elif choice == '2':
-                test_login(stub)
+                test_login(pool.next_stub())
             elif choice == '3':
-                test_enroll(stub)
+                test_enroll(pool.next_stub())
             elif choice == '4':
                 print("Goodbye!")
                 break
@@ -120,6 +184,110 @@ def main():
         except Exception as e:
             print(f"An error occurred: {e}")
             break
+    
+    pool.close()
+    return 0
+
+def build_request(op):
+    method, request_type = OPERATIONS[op['op']]
+    # Blank fields (e.g. empty CSV cells) are left unset like in the interactive flow
+    return method, request_type(**{k: v for k, v in op.items() if k != 'op' and v})
+
+def load_ops(path):
+    # A JSON list of objects or a CSV with a header row; every entry needs an 'op' column
+    with open(path, newline='') as f:
+        if path.endswith('.json'):
+            ops = json.load(f)
+        else:
+            ops = list(csv.DictReader(f))
+    if not isinstance(ops, list):
+        raise ValueError(f"{path}: expected a list of operations")
+    # Entries are numbered from 1, matching the data rows after a CSV header
+    for i, op in enumerate(ops, 1):
+        if not isinstance(op, dict):
+            raise ValueError(f"{path}: entry {i} is not an object")
+        # Report only the op, not the row, which may hold a password
+        if op.get('op') not in OPERATIONS:
+            raise ValueError(f"{path}: entry {i} needs an 'op' of {'/'.join(OPERATIONS)}, got {op.get('op')!r}")
+        try:
+            build_request(op)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: entry {i} is not a valid {op['op']} request: {e}") from None
+    return ops
+
+def run_once(target, op):
+    pool = ChannelPool(target, size=1)
+    try:
+        method, request = build_request(op)
+        response = getattr(pool.next_stub(), method)(request)
+        print(f"[RESPONSE] {response.message}")
+        return 0 if response.success else 1
+    except grpc.RpcError as e:
+        print(f"Error during {op['op']}: {e}")
+        return 1
+    finally:
+        pool.close()
+
+async def bench(target, ops, channels, concurrency):
+    pool = ChannelPool(target, size=channels, channel_factory=aio.insecure_channel)
+    limit = asyncio.Semaphore(concurrency)
+    
+    async def worker(stub, method, request):
+        async with limit:
+            try:
+                return (await getattr(stub, method)(request)).success
+            except aio.AioRpcError:
+                return False
+    
+    calls = [build_request(op) for op in ops]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(worker(pool.next_stub(), method, request) for method, request in calls))
+    elapsed = time.perf_counter() - start
+    await pool.aclose()
+    
+    succeeded = sum(results)
+    rate = len(results) / elapsed if elapsed else 0.0
+    print(f"{len(results)} calls in {elapsed:.3f}s ({rate:.1f}/s), {succeeded} succeeded, {len(results) - succeeded} failed")
+    return 0 if succeeded == len(results) else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cloud Security test client; interactive when no command is given")
+    parser.add_argument('--target', default='localhost:51234', help="server address (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command')
+    
+    signup = commands.add_parser('signup', help="send one signup request")
+    signup.add_argument('--username', required=True)
+    signup.add_argument('--email', required=True)
+    signup.add_argument('--password', required=True)
+    signup.add_argument('--full-name', dest='full_name', default='')
+    
+    login = commands.add_parser('login', help="send one login request")
+    login.add_argument('--username', required=True)
+    login.add_argument('--password', required=True)
+    
+    enroll = commands.add_parser('enroll', help="send one enrollment update")
+    enroll.add_argument('--username', required=True)
+    enroll.add_argument('--email', default='')
+    enroll.add_argument('--phone', default='')
+    
+    bench_cmd = commands.add_parser('bench', help="fire a file of operations concurrently over grpc.aio")
+    bench_cmd.add_argument('ops', help="JSON list or CSV of operations, each with an 'op' of signup/login/enroll")
+    bench_cmd.add_argument('--channels', type=int, default=4, help="channels in the pool (default: %(default)s)")
+    bench_cmd.add_argument('--concurrency', type=int, default=64, help="max calls in flight (default: %(default)s)")
+    
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return interactive(args.target)
+    if args.command == 'bench':
+        try:
+            ops = load_ops(args.ops)
+        except (OSError, ValueError) as e:
+            print(f"Error loading operations: {e}", file=sys.stderr)
+            return 1
+        return asyncio.run(bench(args.target, ops, args.channels, args.concurrency))
+    op = {k: v for k, v in vars(args).items() if k not in ('target', 'command')}
+    op['op'] = args.command
+    return run_once(args.target, op)
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -1,8 +1,13 @@
 import smtplib
+import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from params import from_email, from_password, app_password
 
+# Same TLS settings as the OTP sender in utils.py
+TLS_CONTEXT = ssl.create_default_context()
+TLS_CONTEXT.minimum_version = ssl.TLSVersion.TLSv1_3
+
 def test_email_sending():
     """Test if email credentials work"""
     
@@ -20,9 +25,8 @@ def test_email_sending():
         print("Connecting to Gmail SMTP server...")
         
         # Try different SMTP settings for Gmail
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            print("TLS started successfully")
+        with smtplib.SMTP_SSL('smtp.gmail.com', 465, context=TLS_CONTEXT) as server:
+            print("TLS connection established")
             
             print("Attempting login...")
             server.login(from_email, app_password)
@@ -1,61 +1,187 @@
 import bcrypt
-import random
+import itertools
+import logging
+import queue
+import secrets
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import socket
+import ssl
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from params import from_email, from_password, app_password
 
+logger = logging.getLogger(__name__)
+
+HASH_BATCH_SIZE = 1024  # ids records in flight in the hashing pool at once
+
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 465  # Implicit TLS; saves the STARTTLS round trip
+SMTP_KEEPALIVE_SECONDS = 30  # Idle time before the sender NOOPs to keep the session alive
+SMTP_TIMEOUT_SECONDS = 30  # Deadline per socket operation, so a half-open session can't hang a sender
+SMTP_SENDER_THREADS = 4  # Parallel sessions, so a burst of OTPs doesn't queue behind one socket
+
+# One context for every sender and reconnect instead of rebuilding the CA store each time; Gmail speaks TLS 1.3
+SMTP_TLS_CONTEXT = ssl.create_default_context()
+SMTP_TLS_CONTEXT.minimum_version = ssl.TLSVersion.TLSv1_3
+
+# Only the recipient and the code vary between OTP emails, so fill a raw RFC 5322 template
+OTP_EMAIL_TEMPLATE = (
+    "From: {sender}\r\n"
+    "To: {to}\r\n"
+    "Subject: Your OTP Code for Cloud Security\r\n"
+    "MIME-Version: 1.0\r\n"
+    "Content-Type: text/plain; charset=utf-8\r\n"
+    "\r\n"
+    "Your OTP code is: {otp}\r\n"
+)
+
+def hash_password_bytes(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt())
+
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), 
-                         bcrypt.gensalt()).decode('utf-8')
+    return hash_password_bytes(password.encode('utf-8')).decode('utf-8')
+
+def hash_credential(entry):
+    # entry is a (username, password) pair of bytes read from the ids file; hash it without decoding
+    # A failure comes back as a None hash so one bad record can't abort the whole map
+    username, password = entry
+    try:
+        return username, hash_password_bytes(password)
+    except ValueError:
+        return username, None
 
 def generate_otp():
-    return str(random.randint(100000, 999999))
+    return str(secrets.randbelow(900000) + 100000)
+
+def build_otp_message(to_email, otp) -> bytes:
+    # The address lands in a raw header, so refuse anything that could inject more headers
+    if '\r' in to_email or '\n' in to_email:
+        raise ValueError(f"Invalid email address: {to_email!r}")
+    return OTP_EMAIL_TEMPLATE.format(sender=from_email, to=to_email, otp=otp).encode('utf-8')
+
+def print_fallback_otp(to_email, otp) -> None:
+    # Fallback to console output if email fails
+    print("\n" + "="*50)
+    print(f"FALLBACK: OTP for {to_email} is: {otp}")
+    print("="*50 + "\n")
+    print("Tip: Check your email credentials or enable 'Less secure app access' if using Gmail")
+
+class SMTPSender(threading.Thread):
+    """Owns one logged-in SMTP session and sends queued OTP emails over it"""
+
+    def __init__(self, otp_queue, name='smtp-sender'):
+        super().__init__(name=name, daemon=True)
+        self.queue = otp_queue
+        self.server = None
+
+    def _connect(self):
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS, context=SMTP_TLS_CONTEXT)
+        server.login(from_email, app_password)  # Using app password from params.py
+        logger.debug('%s logged in to %s', self.name, SMTP_HOST)
+        self.server = server
+
+    def _close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+    def _send(self, to_email, msg):
+        # The idle session may have been dropped or gone half-open; reconnect once
+        for attempt in range(2):
+            try:
+                if self.server is None:
+                    self._connect()
+                self.server.sendmail(from_email, [to_email], msg)
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout):
+                self._close()
+                if attempt:
+                    raise
+            except Exception:
+                self._close()
+                raise
+
+    def _keepalive(self):
+        if self.server is None:
+            return
+        try:
+            self.server.noop()
+        except (smtplib.SMTPException, OSError):
+            self._close()
+
+    def run(self):
+        while True:
+            try:
+                to_email, otp, msg = self.queue.get(timeout=SMTP_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                self._keepalive()
+                continue
+            # Log once per email rather than printing between SMTP commands
+            try:
+                self._send(to_email, msg)
+                logger.info('OTP sent to %s', to_email)
+            except Exception:
+                logger.exception('Failed to send OTP email to %s', to_email)
+                print_fallback_otp(to_email, otp)
+
+_otp_queue = queue.Queue()
+_senders = []
+_senders_lock = threading.Lock()
+
+def start_smtp_senders() -> None:
+    with _senders_lock:
+        if not _senders:
+            for i in range(SMTP_SENDER_THREADS):
+                sender = SMTPSender(_otp_queue, name=f'smtp-sender-{i}')
+                sender.start()
+                _senders.append(sender)
 
 def send_otp(to_email, otp) -> str:
-    # Sender configuration
-    subject = "Your OTP Code for Cloud Security"
-    body = f"Your OTP code is: {otp}"
-
-    # Create the email
-    msg = MIMEMultipart()
-    msg['From'] = from_email  # Using the email from params.py
-    msg['To'] = to_email
-    msg['Subject'] = subject
-    
-    msg.attach(MIMEText(body, 'plain'))
+    # Delivery happens on the sender threads; failures fall back to console output there
+    start_smtp_senders()
+    _otp_queue.put((to_email, otp, build_otp_message(to_email, otp)))
+    return f"OTP queued for {to_email}"
 
-    try:
-        # Connect and send email using Gmail SMTP
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            print("Starting TLS session...", end='')
-            server.starttls()
-            print('[OK]')
-            print("Logging in to email server...", end='')
-            server.login(from_email, app_password)  # Using app password from params.py
-            print('[OK]')
-            print(f"Sending OTP to {to_email}...", end='')
-            server.send_message(msg)
-            print('[OK]')
-            print(f"\nOTP successfully sent to {to_email}")
-            return f"OTP sent to {to_email}"
-    except Exception as e:
-        print(f"\nFailed to send email: {e}")
-        # Fallback to console output if email fails
-        print("\n" + "="*50)
-        print(f"FALLBACK: OTP for {to_email} is: {otp}")
-        print("="*50 + "\n")
-        print("Tip: Check your email credentials or enable 'Less secure app access' if using Gmail")
-        return f"Email failed, using fallback OTP display"
+def read_credentials(ids_file):
+    # Keep the first entry per username and report repeats instead of silently overwriting them
+    seen = set()
+    for lineno, line in enumerate(ids_file, 1):
+        if not line.strip():
+            continue
+        username, sep, password = line.rstrip(b'\r\n').partition(b',')
+        if not sep:
+            # Don't echo the line: without a comma it may be a bare password
+            logger.warning('Skipping line %d in ids: expected username,password', lineno)
+            continue
+        try:
+            # Login compares the UTF-8 encoded password, so anything else could never match
+            password.decode('utf-8')
+        except UnicodeDecodeError:
+            logger.warning('Skipping line %d in ids: password is not valid UTF-8', lineno)
+            continue
+        if username in seen:
+            logger.warning('Skipping duplicate username in ids: %s', username.decode(errors='replace'))
+            continue
+        seen.add(username)
+        yield username, password
 
 if __name__ == '__main__':
-    credentials = {}
-    file_path = 'ids'
-    with open(file_path, 'r') as file:
-        for line in file:
-            username, password = line.strip().split(',')
-            credentials[username] = password
-
-    with open('credentials', 'w') as file:
-        for username, password in credentials.items():
-            file.write(f'{username},{hash_password(password)}\n')
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    # Each hash is independent CPU-bound work, so spread it across cores and
+    # write results as they come back instead of collecting them in a dict.
+    # Lines stay bytes end to end; partition(b',') keeps commas inside passwords intact.
+    # Executor.map submits its whole input up front, so feed it bounded batches
+    # and write each one before reading the next to keep memory flat.
+    with open('ids', 'rb') as ids_file, \
+            open('credentials', 'wb') as file, \
+            ProcessPoolExecutor() as executor:
+        credentials = read_credentials(ids_file)
+        while batch := list(itertools.islice(credentials, HASH_BATCH_SIZE)):
+            for username, password_hash in executor.map(hash_credential, batch, chunksize=32):
+                if password_hash is None:
+                    logger.warning('Skipping %s: password could not be hashed', username.decode(errors='replace'))
+                    continue
+                file.write(username + b',' + password_hash + b'\n')